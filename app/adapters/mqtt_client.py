@@ -8,6 +8,7 @@ from domain.models import SensorEvent, Command
 from application.services import AccessService
 from adapters.ws import manager
 from domain.SpotAllocator import SpotAllocator, SpotAllocatorIndexBuilder  
+from domain.PlateIndex import PlateIndex
 
 BROKER_HOST = "mosquitto"
 TOPIC_EVENTS = "sensors/+/events"
@@ -45,6 +46,7 @@ _client: Optional[Client] = None
 mqtt_actuator = MqttActuator()          # ← sin client, se inyecta en start_mqtt
 event_repo = InMemoryEventRepo()
 spot_allocator = SpotAllocator(SpotAllocatorIndexBuilder())        # ← instancia ÚNICA y correcta
+plate_index = PlateIndex()              # ← se carga en el startup y se refresca vía NOTIFY
 
 _consume_task: Optional[asyncio.Task] = None
 
@@ -57,7 +59,7 @@ async def start_mqtt(on_event):
         async with Client(BROKER_HOST) as client:
             _client = client
             mqtt_actuator.set_client(client)     # ← inyección
-            service = AccessService(mqtt_actuator, event_repo, spot_allocator, SessionLocal)
+            service = AccessService(mqtt_actuator, event_repo, spot_allocator, SessionLocal, plate_index)
 
             async with client.unfiltered_messages() as messages:
                 await client.subscribe(TOPIC_EVENTS)
@@ -0,0 +1,128 @@
+import json
+import asyncio
+import logging
+import contextlib
+from typing import Awaitable, Callable, Optional
+from deps import engine, SessionLocal
+from domain.PlateIndex import PlateIndex, PlateIndexBuilder
+
+"""
+Mantiene el PlateIndex al día con la tabla cars.
+
+En Postgres escucha el canal LISTEN/NOTIFY 'cars_changed' (ver trigger
+trg_cars_notify en init.sql) y aplica cada cambio al índice. El orden es:
+LISTEN primero, después la carga completa; lo que llega durante la carga se
+encola y se reaplica al terminar (upsert/remove son idempotentes). Si la
+conexión se cae o llega un payload inválido, el índice deja de estar `live`
+(el servicio confirma contra la DB) y se reconecta con una recarga completa.
+
+En SQLite no hay NOTIFY: se carga una vez y el índice queda no-`live`.
+"""
+
+CARS_CHANNEL = "cars_changed"
+RECONNECT_DELAY_S = 5.0
+
+log = logging.getLogger(__name__)
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _rebuild(index: PlateIndex) -> None:
+    async with SessionLocal() as session:
+        await PlateIndexBuilder().build_from_db(session, index)
+
+
+def apply_notification(index: PlateIndex, data: dict) -> None:
+    """Aplica un payload de fn_cars_notify: {op, plate, car_type?, old_plate?}."""
+    if data["op"] == "DELETE":
+        index.remove(data["plate"])
+        return
+    if data.get("old_plate") and data["old_plate"] != data["plate"]:
+        index.remove(data["old_plate"])
+    index.upsert(data["plate"], data["car_type"])
+
+
+class NotificationBuffer:
+    """
+    Aplica las notificaciones al índice, o las encola mientras hay una recarga
+    en curso para reaplicarlas sobre la foto nueva al terminar.
+    """
+    def __init__(self, index: PlateIndex) -> None:
+        self.index = index
+        self.pending: Optional[list] = None
+
+    def handle(self, data: dict) -> None:
+        if self.pending is not None:
+            self.pending.append(data)
+        else:
+            apply_notification(self.index, data)
+
+    async def rebuild(self, load: Callable[[PlateIndex], Awaitable[None]]) -> None:
+        self.pending = []
+        try:
+            await load(self.index)
+            queued = self.pending
+        finally:
+            self.pending = None
+        for data in queued:
+            apply_notification(self.index, data)
+
+
+async def _listen(index: PlateIndex) -> None:
+    import asyncpg
+
+    dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+    wake = asyncio.Event()
+    buffer = NotificationBuffer(index)
+
+    def _on_notify(conn, pid, channel, payload: str) -> None:
+        try:
+            buffer.handle(json.loads(payload))
+        except Exception:
+            log.exception("payload inválido en %s: %r; se recarga el índice", CARS_CHANNEL, payload)
+            index.live = False
+            wake.set()
+
+    def _on_lost(conn) -> None:
+        log.warning("conexión LISTEN %s cerrada", CARS_CHANNEL)
+        index.live = False
+        wake.set()
+
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn)
+            conn.add_termination_listener(_on_lost)
+            await conn.add_listener(CARS_CHANNEL, _on_notify)
+            log.info("listening on %s", CARS_CHANNEL)
+            while not conn.is_closed():
+                wake.clear()
+                await buffer.rebuild(_rebuild)
+                index.live = True
+                await wake.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("listener de %s falló; reintentando en %ss", CARS_CHANNEL, RECONNECT_DELAY_S)
+        finally:
+            index.live = False
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(RECONNECT_DELAY_S)
+
+
+async def start_cars_listener(index: PlateIndex) -> None:
+    global _task
+    if engine.url.get_backend_name() != "postgresql":
+        await _rebuild(index)
+        return
+    _task = asyncio.create_task(_listen(index))
+
+
+async def stop_cars_listener() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _task
+        _task = None
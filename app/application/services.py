@@ -1,9 +1,10 @@
 from domain.models import SensorEvent, Command, CommandMessage, DecisionMessage
 from typing import Protocol
-from adapters.repo_postgres import AuthorizationRepo
+from adapters.repo_postgres import AuthorizationRepo, normalize_plate
 from adapters.ws import manager
 from fastapi.encoders import jsonable_encoder
 from domain.SpotAllocator import SpotAllocator
+from domain.PlateIndex import PlateIndex, PlateMatch
 from adapters.ws import SPOT_FEED_ROOM
 from datetime import datetime, timezone
 from sqlalchemy import text
@@ -21,6 +22,16 @@ mite Command(OPEN) hacia el broker para que la barrera lo reciba y se abra.
 
 """
 
+def parse_confidence(value) -> float:
+    """Confianza del OCR en [0, 1]; cualquier valor inválido (texto, escala 0-100, NaN) vale 0.0."""
+    if isinstance(value, bool):
+        return 0.0
+    try:
+        conf = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return conf if 0.0 <= conf <= 1.0 else 0.0
+
 class ActuatorOut(Protocol):
     async def publish_command(self, cmd: Command) -> None: ...
 
@@ -29,19 +40,50 @@ class EventRepo(Protocol):
     async def seen_event(self, event_id: str) -> bool: ...
 
 class AccessService:
-    def __init__(self, actuator: ActuatorOut, repo: EventRepo, spot_allocator: SpotAllocator, session_factory: async_sessionmaker[AsyncSession]):
+    def __init__(self, actuator: ActuatorOut, repo: EventRepo, spot_allocator: SpotAllocator, session_factory: async_sessionmaker[AsyncSession], plate_index: PlateIndex | None = None):
         self.actuator = actuator
         self.repo = repo
         self.spot_allocator = spot_allocator
         self.session_factory = session_factory  
+        self.plate_index = plate_index
 
-    async def _is_plate_authorized(self, plate: str) -> str | None:
-        stmt = text('SELECT car_type FROM cars WHERE plate = :plate LIMIT 1')
+    async def _fetch_car(self, plate: str) -> tuple[str, str] | None:
+        stmt = text('SELECT plate, car_type FROM cars WHERE plate = :plate LIMIT 1')
         async with self.session_factory() as session:
             res = await session.execute(stmt, {"plate": plate})
-            return res.scalar_one_or_none()
-
- 
+            row = res.first()
+            return (row[0], row[1]) if row else None
+
+    async def _is_plate_authorized(self, plate: str, confidence: float = 0.0) -> PlateMatch:
+        """
+        Resuelve la lectura contra el índice en memoria (tolerante a OCR).
+        - Índice `live` (listener al día): el índice es la fuente de verdad y no
+          se consulta la DB, ni siquiera para lecturas rechazadas.
+        - Índice no `live` (SQLite, listener reconectando) o sin cargar: primero
+          la lectura exacta por PK (puede ser un alta que el índice no vio, p.ej.
+          A8C123 registrada después de ABC123); solo si no existe se usa el match
+          del índice, confirmándolo por PK y descartándolo si ya no está.
+        """
+        index = self.plate_index
+        if index is not None and index.loaded and index.live:
+            return index.match(plate, confidence)
+
+        row = await self._fetch_car(normalize_plate(plate))
+        if row:
+            if index is not None:
+                index.upsert(row[0], row[1])
+            return PlateMatch(row[0], row[1], "EXACT", (row[0],))
+        if index is None or not index.loaded:
+            return PlateMatch(None, None, "NONE")
+
+        match = index.match(plate, confidence)
+        if not match.accepted:
+            return match
+        row = await self._fetch_car(match.plate)
+        if row:
+            return PlateMatch(row[0], row[1], match.kind, match.candidates)
+        index.remove(match.plate)
+        return PlateMatch(None, None, "NONE")
 
     async def handle_sensor_event(self, ev: SensorEvent):
         # 0) Dedupe
@@ -60,15 +102,16 @@ class AccessService:
         if ev.type != "PLATE_READ":
             return
 
-        plate = ev.payload.get("plate")
-        car_type = await self._is_plate_authorized(plate)
+        read_plate = ev.payload.get("plate")
+        match = await self._is_plate_authorized(read_plate, parse_confidence(ev.payload.get("confidence")))
+        plate, car_type = match.plate, match.car_type
 
-        if not car_type:
-            # DENY
+        if not match.accepted:
+            # DENY (candidates: sugerencias para revisión manual)
             await manager.send_room(f"gate:{ev.device_id}", {
                 "type": "decision",
                 "device_id": ev.device_id,
-                "payload": {"result": "DENY", "plate": plate}
+                "payload": {"result": "DENY", "plate": read_plate, "match": match.kind, "suggestions": list(match.candidates)}
             })
             await manager.send_room(
                 SPOT_FEED_ROOM,
@@ -76,7 +119,7 @@ class AccessService:
                     "type": "spot_assigned",
                     "payload": {
                         "spot": "ACCESO DENEGADO",
-                        "plate": plate,
+                        "plate": read_plate,
                         "gate_id": ev.device_id,
                         "event_id": ev.event_id,
                         "assigned_at": datetime.now(timezone.utc).isoformat(),
@@ -97,7 +140,7 @@ class AccessService:
         await manager.send_room(f"gate:{ev.device_id}", {
             "type": "decision",
             "device_id": ev.device_id,
-            "payload": {"result": "ALLOW", "plate": plate}
+            "payload": {"result": "ALLOW", "plate": plate, "read_plate": read_plate, "match": match.kind}
         })
 
         # 4) Buscar spot + persistir allocation en una transacción
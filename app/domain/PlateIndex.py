@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from adapters.repo_postgres import normalize_plate
+
+"""
+Índice en memoria de matrículas registradas (tabla cars) tolerante a errores de OCR.
+
+Niveles de coincidencia, de más a menos confiable:
+  1) EXACT:      la lectura limpia (upper, solo alfanuméricos) coincide con una
+                 matrícula registrada. Se acepta sin importar la confianza.
+  2) CONFUSABLE: difiere solo en sustituciones dentro de una misma clase de
+                 caracteres confundibles (O/0, I/1, B/8, S/5, ...). Se acepta si
+                 la confianza alcanza un piso que crece con cada sustitución.
+  3) FUZZY:      la clave canónica está a distancia de edición 1 (índice de
+                 borrados). NUNCA se acepta: se devuelve como sugerencia para
+                 revisión manual, porque ABC1234 es otra matrícula válida y no
+                 un error de lectura de ABC123.
+Solo se acepta si en el nivel hay UNA sola matrícula; una lectura sin
+confianza se trata como confianza 0.
+"""
+
+# Cada grupo colapsa a su primer carácter en la clave canónica
+CONFUSABLE_GROUPS = ("0ODQ", "1IL", "8B", "5S", "2Z", "6G")
+_CANON = str.maketrans({c: g[0] for g in CONFUSABLE_GROUPS for c in g})
+
+
+def clean_plate(p: str) -> str:
+    """Normaliza (upper, sin espacios) y descarta todo lo que no sea alfanumérico."""
+    return "".join(c for c in normalize_plate(p) if c.isalnum())
+
+
+def canonical_key(p: str) -> str:
+    return clean_plate(p).translate(_CANON)
+
+
+def deletions(key: str) -> Set[str]:
+    """Variantes de la clave con exactamente un carácter borrado."""
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        return sum(x != y for x, y in zip(a, b)) <= 1
+    if len(a) < len(b):
+        a, b = b, a
+    i = 0
+    while i < len(b) and a[i] == b[i]:
+        i += 1
+    return a[i + 1:] == b[i:]
+
+
+@dataclass(frozen=True)
+class PlateMatch:
+    plate: Optional[str]        # valor de cars.plate (None si no se acepta)
+    car_type: Optional[str]
+    kind: str                   # 'EXACT' | 'CONFUSABLE' | 'FUZZY' | 'AMBIGUOUS' | 'NONE'
+    candidates: Tuple[str, ...] = ()   # si no se acepta: sugerencias para revisión manual
+
+    @property
+    def accepted(self) -> bool:
+        return self.plate is not None
+
+
+class PlateIndex:
+    """
+    Índice en memoria sobre las filas de cars:
+      - rows:        cars.plate -> car_type
+      - by_clean:    matrícula limpia -> cars.plate (AB-999 y AB999 limpian igual)
+      - by_key:      clave canónica -> matrículas limpias
+      - by_deletion: clave con un carácter borrado -> claves canónicas
+    Se actualiza incrementalmente con upsert()/remove(). `live` indica que hay
+    un listener manteniéndolo al día; si es False, quien lo usa debe confirmar
+    los aciertos contra la DB.
+    """
+    def __init__(self, confusable_base_confidence: float = 0.6, confusable_step: float = 0.1) -> None:
+        self.confusable_base_confidence = confusable_base_confidence
+        self.confusable_step = confusable_step
+        self.loaded = False
+        self.live = False
+        self.rows: Dict[str, str] = {}
+        self.by_clean: Dict[str, Set[str]] = {}
+        self.by_key: Dict[str, Set[str]] = {}
+        self.by_deletion: Dict[str, Set[str]] = {}
+
+    def build(self, cars: List[Tuple[str, str]]) -> None:
+        self.rows, self.by_clean, self.by_key, self.by_deletion = {}, {}, {}, {}
+        for plate, car_type in cars:
+            self.upsert(plate, car_type)
+        self.loaded = True
+
+    def upsert(self, plate: str, car_type: str) -> None:
+        norm = clean_plate(plate)
+        if not norm:
+            return
+        self.rows[plate] = car_type
+        self.by_clean.setdefault(norm, set()).add(plate)
+        key = canonical_key(norm)
+        if key not in self.by_key:
+            for d in deletions(key):
+                self.by_deletion.setdefault(d, set()).add(key)
+        self.by_key.setdefault(key, set()).add(norm)
+
+    def remove(self, plate: str) -> None:
+        if self.rows.pop(plate, None) is None:
+            return
+        norm = clean_plate(plate)
+        originals = self.by_clean.get(norm)
+        if originals is None:
+            return
+        originals.discard(plate)
+        if originals:
+            return
+        del self.by_clean[norm]
+        key = canonical_key(norm)
+        plates = self.by_key.get(key)
+        if plates is None:
+            return
+        plates.discard(norm)
+        if not plates:
+            del self.by_key[key]
+            for d in deletions(key):
+                keys = self.by_deletion.get(d)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.by_deletion[d]
+
+    def required_confidence(self, substitutions: int) -> float:
+        return self.confusable_base_confidence + self.confusable_step * substitutions
+
+    def _originals(self, cleaned: Set[str]) -> List[str]:
+        return sorted(p for c in cleaned for p in self.by_clean[c])
+
+    def _exact(self, read: str, norm: str) -> PlateMatch:
+        originals = self.by_clean[norm]
+        if len(originals) > 1:
+            # p.ej. AB-999 y AB999: solo desempata la lectura sin limpiar
+            same = [p for p in originals if normalize_plate(p) == read]
+            if len(same) != 1:
+                return PlateMatch(None, None, "AMBIGUOUS", tuple(sorted(originals)))
+            plate = same[0]
+        else:
+            plate = next(iter(originals))
+        return PlateMatch(plate, self.rows[plate], "EXACT", (plate,))
+
+    def match(self, plate: Optional[str], confidence: Optional[float] = None) -> PlateMatch:
+        norm = clean_plate(plate or "")
+        if not norm:
+            return PlateMatch(None, None, "NONE")
+        conf = confidence if confidence is not None else 0.0
+
+        # 1) Exacta
+        if norm in self.by_clean:
+            return self._exact(normalize_plate(plate), norm)
+
+        # 2) Misma clave canónica: solo sustituciones dentro de clases confundibles
+        key = canonical_key(norm)
+        cleaned = self.by_key.get(key)
+        if cleaned:
+            candidates = self._originals(cleaned)
+            if len(candidates) > 1:
+                return PlateMatch(None, None, "AMBIGUOUS", tuple(candidates))
+            plate = candidates[0]
+            subs = sum(a != b for a, b in zip(norm, clean_plate(plate)))
+            if conf < self.required_confidence(subs):
+                return PlateMatch(None, None, "CONFUSABLE", (plate,))
+            return PlateMatch(plate, self.rows[plate], "CONFUSABLE", (plate,))
+
+        # 3) Distancia 1 (inserción, borrado o sustitución libre): solo sugerencia
+        keys = set(self.by_deletion.get(key, ()))
+        for d in deletions(key):
+            if d in self.by_key:
+                keys.add(d)
+            keys |= self.by_deletion.get(d, set())
+        near: Set[str] = set()
+        for k in keys:
+            if within_one_edit(key, k):
+                near |= self.by_key[k]
+        if not near:
+            return PlateMatch(None, None, "NONE")
+        return PlateMatch(None, None, "FUZZY", tuple(self._originals(near)))
+
+
+class PlateIndexBuilder:
+    """
+    Capa que lee la tabla cars y construye/recarga el PlateIndex.
+    """
+    def __init__(self, table_name: str = "cars") -> None:
+        self.table_name = table_name
+
+    async def fetch_cars(self, session: AsyncSession) -> List[Tuple[str, str]]:
+        q = text(f"SELECT plate, car_type FROM {self.table_name}")
+        rows = (await session.execute(q)).all()
+        return [(str(r[0]), str(r[1])) for r in rows]
+
+    async def build_from_db(self, session: AsyncSession, index: Optional[PlateIndex] = None) -> PlateIndex:
+        index = index or PlateIndex()
+        index.build(await self.fetch_cars(session))
+        return index
@@ -102,6 +102,36 @@ BEFORE DELETE ON public.allocation
 FOR EACH ROW
 EXECUTE FUNCTION public.fn_allocation_release_spot();
 
+-- Notificar cambios en cars para refrescar el índice de matrículas en memoria
+DROP FUNCTION IF EXISTS public.fn_cars_notify() CASCADE;
+
+CREATE OR REPLACE FUNCTION public.fn_cars_notify()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $func$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM pg_notify('cars_changed', json_build_object(
+      'op', TG_OP, 'plate', OLD.plate)::text);
+    RETURN OLD;
+  END IF;
+
+  PERFORM pg_notify('cars_changed', json_build_object(
+    'op', TG_OP,
+    'plate', NEW.plate,
+    'car_type', NEW.car_type,
+    'old_plate', CASE WHEN TG_OP = 'UPDATE' THEN OLD.plate END)::text);
+  RETURN NEW;
+END;
+$func$;
+
+DROP TRIGGER IF EXISTS trg_cars_notify ON public.cars;
+
+CREATE TRIGGER trg_cars_notify
+AFTER INSERT OR UPDATE OR DELETE ON public.cars
+FOR EACH ROW
+EXECUTE FUNCTION public.fn_cars_notify();
+
 -- =========================================
 -- USERS
 -- =========================================
@@ -1,7 +1,8 @@
 import uvicorn
 from fastapi import FastAPI
 from adapters.http_api import api_router
-from adapters.mqtt_client import start_mqtt, stop_mqtt
+from adapters.mqtt_client import start_mqtt, stop_mqtt, plate_index
+from adapters.pg_listener import start_cars_listener, stop_cars_listener
 from adapters.ws import router as ws_router
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
@@ -57,6 +58,9 @@ async def on_startup():
         spot_index: SpotIndex = await allocator.find_spot(session, car_type="GENERAL")
         app.state.spot_index = spot_index
 
+    # 1.b) Índice de matrículas en memoria (tolerante a OCR): LISTEN + carga
+    await start_cars_listener(plate_index)
+
     # 2) Tu callback MQTT tal cual lo tenías
     async def on_event(ev: dict):
         if ev.get("type") != "PLATE_READ":
@@ -70,4 +74,5 @@ async def on_startup():
 @app.on_event("shutdown")
 async def on_shutdown():    
     await stop_mqtt()
+    await stop_cars_listener()
 
@@ -0,0 +1,4 @@
+import os
+
+# deps.py crea el engine al importarse; los tests no tocan la DB real
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
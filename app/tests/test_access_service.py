@@ -0,0 +1,133 @@
+import pytest
+
+from application.services import AccessService, parse_confidence
+from domain.PlateIndex import PlateIndex
+
+
+class StubResult:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class StubSession:
+    def __init__(self, cars, queries):
+        self.cars = cars
+        self.queries = queries
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params):
+        self.queries.append(params["plate"])
+        plate = params["plate"]
+        return StubResult((plate, self.cars[plate]) if plate in self.cars else None)
+
+
+class StubSessionFactory:
+    """Simula la tabla cars: cada execute() es un round trip por PK."""
+    def __init__(self, cars):
+        self.cars = dict(cars)
+        self.queries = []
+
+    def __call__(self):
+        return StubSession(self.cars, self.queries)
+
+
+def make_service(cars, indexed=None, live=False):
+    db = StubSessionFactory(cars)
+    index = PlateIndex()
+    index.build(list((indexed if indexed is not None else cars).items()))
+    index.live = live
+    return AccessService(None, None, None, db, index), db, index
+
+
+# --- índice live: sin round trips ---
+
+@pytest.mark.asyncio
+async def test_live_index_accepts_without_db():
+    service, db, _ = make_service({"ABC123": "GENERAL"}, live=True)
+    m = await service._is_plate_authorized("ABCI23", 0.97)
+    assert (m.plate, m.kind) == ("ABC123", "CONFUSABLE")
+    assert db.queries == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("read,conf", [("ABC1234", 0.97), ("A8C1Z3", 0.1), ("QQQ999", 0.99)])
+async def test_live_index_rejects_without_db(read, conf):
+    service, db, _ = make_service({"ABC123": "GENERAL"}, live=True)
+    m = await service._is_plate_authorized(read, conf)
+    assert not m.accepted
+    assert db.queries == []
+
+
+# --- índice no live: la DB manda ---
+
+@pytest.mark.asyncio
+async def test_not_live_exact_read_wins_over_confusable_match():
+    # A8C123 se registró después de cargar el índice (que solo tiene ABC123)
+    service, db, index = make_service(
+        {"ABC123": "GENERAL", "A8C123": "DISABLED"}, indexed={"ABC123": "GENERAL"})
+    m = await service._is_plate_authorized("A8C123", 0.97)
+    assert (m.plate, m.car_type, m.kind) == ("A8C123", "DISABLED", "EXACT")
+    assert db.queries == ["A8C123"]
+    assert "A8C123" in index.rows
+
+
+@pytest.mark.asyncio
+async def test_not_live_confirms_index_match_by_pk():
+    service, db, _ = make_service({"ABC123": "GENERAL"})
+    m = await service._is_plate_authorized("ABCI23", 0.97)
+    assert (m.plate, m.kind) == ("ABC123", "CONFUSABLE")
+    assert db.queries == ["ABCI23", "ABC123"]
+
+
+@pytest.mark.asyncio
+async def test_not_live_removes_stale_entry():
+    service, db, index = make_service({}, indexed={"ABC123": "GENERAL"})
+    m = await service._is_plate_authorized("ABCI23", 0.97)
+    assert not m.accepted
+    assert "ABC123" not in index.rows
+    assert db.queries == ["ABCI23", "ABC123"]
+
+
+@pytest.mark.asyncio
+async def test_not_live_rejected_match_keeps_suggestions():
+    service, db, _ = make_service({"ABC123": "GENERAL"})
+    m = await service._is_plate_authorized("ABC1234", 0.97)
+    assert (m.accepted, m.kind, m.candidates) == (False, "FUZZY", ("ABC123",))
+    assert db.queries == ["ABC1234"]
+
+
+@pytest.mark.asyncio
+async def test_unloaded_index_falls_back_to_exact_sql():
+    db = StubSessionFactory({"ABC123": "GENERAL"})
+    index = PlateIndex()
+    service = AccessService(None, None, None, db, index)
+    assert (await service._is_plate_authorized("abc 123", 0.0)).plate == "ABC123"
+    assert not (await service._is_plate_authorized("ABCI23", 0.97)).accepted
+    assert db.queries == ["ABC123", "ABCI23"]
+
+
+# --- confianza del payload ---
+
+@pytest.mark.parametrize("value,expected", [
+    (0.97, 0.97),
+    ("0.97", 0.97),
+    (1, 1.0),
+    (0, 0.0),
+    (97, 0.0),
+    (-0.1, 0.0),
+    ("alta", 0.0),
+    (None, 0.0),
+    (True, 0.0),
+    (float("nan"), 0.0),
+    ({"v": 1}, 0.0),
+])
+def test_parse_confidence(value, expected):
+    assert parse_confidence(value) == expected
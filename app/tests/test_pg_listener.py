@@ -0,0 +1,73 @@
+import pytest
+
+from adapters.pg_listener import NotificationBuffer, apply_notification
+from domain.PlateIndex import PlateIndex
+
+
+@pytest.fixture
+def index() -> PlateIndex:
+    idx = PlateIndex()
+    idx.build([("ABC123", "GENERAL")])
+    return idx
+
+
+# payloads con la forma que arma fn_cars_notify (json_build_object)
+
+def test_apply_insert(index):
+    apply_notification(index, {"op": "INSERT", "plate": "XYZ987", "car_type": "DISABLED", "old_plate": None})
+    assert index.rows["XYZ987"] == "DISABLED"
+
+
+def test_apply_update_car_type(index):
+    apply_notification(index, {"op": "UPDATE", "plate": "ABC123", "car_type": "DISABLED", "old_plate": "ABC123"})
+    assert index.rows == {"ABC123": "DISABLED"}
+
+
+def test_apply_update_with_rename(index):
+    apply_notification(index, {"op": "UPDATE", "plate": "ABD123", "car_type": "GENERAL", "old_plate": "ABC123"})
+    assert index.rows == {"ABD123": "GENERAL"}
+    assert index.match("ABC123", 0.99).kind != "EXACT"
+
+
+def test_apply_delete(index):
+    apply_notification(index, {"op": "DELETE", "plate": "ABC123"})
+    assert index.rows == {}
+    assert index.match("ABC123", 0.99).kind == "NONE"
+
+
+def test_buffer_applies_immediately_outside_rebuild(index):
+    buffer = NotificationBuffer(index)
+    buffer.handle({"op": "DELETE", "plate": "ABC123"})
+    assert index.rows == {}
+
+
+@pytest.mark.asyncio
+async def test_buffer_replays_notifications_received_during_rebuild(index):
+    buffer = NotificationBuffer(index)
+
+    async def load(idx):
+        # la foto se tomó antes de estas notificaciones
+        snapshot = [("ABC123", "GENERAL"), ("LMN456", "GENERAL")]
+        buffer.handle({"op": "INSERT", "plate": "XYZ987", "car_type": "DISABLED", "old_plate": None})
+        buffer.handle({"op": "DELETE", "plate": "LMN456"})
+        assert "XYZ987" not in idx.rows
+        idx.build(snapshot)
+
+    await buffer.rebuild(load)
+    assert index.rows == {"ABC123": "GENERAL", "XYZ987": "DISABLED"}
+    assert buffer.pending is None
+
+
+@pytest.mark.asyncio
+async def test_buffer_stops_queueing_when_rebuild_fails(index):
+    buffer = NotificationBuffer(index)
+
+    async def load(idx):
+        buffer.handle({"op": "DELETE", "plate": "ABC123"})
+        raise RuntimeError("db caída")
+
+    with pytest.raises(RuntimeError):
+        await buffer.rebuild(load)
+    assert buffer.pending is None
+    buffer.handle({"op": "INSERT", "plate": "XYZ987", "car_type": "DISABLED", "old_plate": None})
+    assert "XYZ987" in index.rows
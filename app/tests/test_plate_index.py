@@ -0,0 +1,146 @@
+import pytest
+
+from domain.PlateIndex import PlateIndex, canonical_key, deletions, within_one_edit
+
+SEED_CARS = [
+    ("ABC123", "GENERAL"),
+    ("XYZ987", "DISABLED"),
+    ("LMN456", "GENERAL"),
+    ("JKL222", "GENERAL"),
+]
+
+
+@pytest.fixture
+def index() -> PlateIndex:
+    idx = PlateIndex()
+    idx.build(SEED_CARS)
+    return idx
+
+
+def assert_deletions_consistent(idx: PlateIndex) -> None:
+    expected = {}
+    for key in idx.by_key:
+        for d in deletions(key):
+            expected.setdefault(d, set()).add(key)
+    assert idx.by_deletion == expected
+
+
+# --- niveles de coincidencia ---
+
+def test_exact_ignores_spaces_case_and_punctuation(index):
+    m = index.match("a bc-123", None)
+    assert (m.kind, m.plate, m.car_type) == ("EXACT", "ABC123", "GENERAL")
+
+
+def test_confusable_single_substitution(index):
+    m = index.match("ABCI23", 0.9)
+    assert (m.kind, m.plate) == ("CONFUSABLE", "ABC123")
+
+
+def test_confusable_multiple_substitutions_needs_high_confidence(index):
+    assert index.match("A8C1Z3", 0.97).plate == "ABC123"
+    m = index.match("A8C1Z3", 0.1)
+    assert not m.accepted
+    assert m.candidates == ("ABC123",)
+
+
+def test_confusable_floor_scales_with_substitutions(index):
+    # 1 sustitución: piso 0.7; 2 sustituciones: piso 0.8
+    assert index.match("ABCI23", 0.75).accepted
+    assert not index.match("A8CI23", 0.75).accepted
+
+
+def test_missing_confidence_is_low_confidence(index):
+    assert index.match("ABC123", None).accepted
+    assert not index.match("ABCI23", None).accepted
+
+
+@pytest.mark.parametrize("read", ["ABC1234", "XBC123", "ABC12", "JKL2222"])
+def test_fuzzy_is_only_a_suggestion(index, read):
+    m = index.match(read, 0.97)
+    assert not m.accepted
+    assert m.kind == "FUZZY"
+    assert len(m.candidates) == 1
+
+
+def test_ambiguous_confusable(index):
+    index.upsert("ABC1Z3", "GENERAL")
+    m = index.match("A8C123", 0.99)
+    assert m.kind == "AMBIGUOUS"
+    assert m.candidates == ("ABC123", "ABC1Z3")
+
+
+def test_no_match(index):
+    assert index.match("QQQ999", 0.99).kind == "NONE"
+    assert index.match("", 0.99).kind == "NONE"
+    assert index.match(None, 0.99).kind == "NONE"
+
+
+# --- matrícula original de la DB ---
+
+def test_returns_original_db_plate(index):
+    index.upsert("AB-999", "GENERAL")
+    m = index.match("AB999", None)
+    assert (m.kind, m.plate) == ("EXACT", "AB-999")
+
+
+def test_colliding_db_plates(index):
+    index.upsert("AB-999", "GENERAL")
+    index.upsert("AB999", "DISABLED")
+    assert index.match("AB-999", None).plate == "AB-999"
+    assert index.match("AB999", None).car_type == "DISABLED"
+    assert index.match("AB 9-99", None).kind == "AMBIGUOUS"
+    index.remove("AB999")
+    assert index.match("AB999", None).plate == "AB-999"
+
+
+# --- within_one_edit ---
+
+@pytest.mark.parametrize("a,b,expected", [
+    ("ABC", "ABC", True),
+    ("ABC", "ABX", True),
+    ("ABC", "XBC", True),
+    ("ABC", "ABCD", True),
+    ("ABC", "XABC", True),
+    ("ABC", "AC", True),
+    ("", "A", True),
+    ("", "", True),
+    ("ABC", "AXY", False),
+    ("ABC", "BAC", False),
+    ("ABC", "ABCDE", False),
+    ("ABCD", "AXCY", False),
+    ("ABC", "AXCD", False),
+])
+def test_within_one_edit(a, b, expected):
+    assert within_one_edit(a, b) is expected
+    assert within_one_edit(b, a) is expected
+
+
+# --- actualizaciones incrementales ---
+
+def test_upsert_remove_keep_deletion_index_consistent(index):
+    assert_deletions_consistent(index)
+    index.upsert("ABC128", "GENERAL")
+    index.upsert("AB-999", "GENERAL")
+    index.upsert("AB999", "GENERAL")
+    assert_deletions_consistent(index)
+    index.remove("AB999")
+    assert canonical_key("AB999") in index.by_key
+    assert_deletions_consistent(index)
+    for plate in ("ABC128", "AB-999", "ABC123", "NOPE00"):
+        index.remove(plate)
+    assert_deletions_consistent(index)
+    assert canonical_key("ABC123") not in index.by_key
+    assert index.match("ABC123", 0.99).kind == "NONE"
+
+
+def test_upsert_updates_car_type(index):
+    index.upsert("ABC123", "DISABLED")
+    assert index.match("ABC123", None).car_type == "DISABLED"
+
+
+def test_build_replaces_contents(index):
+    index.build([("ZZZ111", "GENERAL")])
+    assert index.match("ABC123", 0.99).kind == "NONE"
+    assert index.match("ZZZ111", None).plate == "ZZZ111"
+    assert_deletions_consistent(index)